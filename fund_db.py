@@ -0,0 +1,145 @@
+import streamlit as st
+import pandas as pd
+import sqlite3
+import threading
+import time
+
+DB = "fund_checklist_table.db"
+
+STEPS = [
+    ("step2_inforequest", "Info Request"),
+    ("step3_analyst",     "Analyst"),
+    ("step4_myreview",    "My Review"),
+    ("step5_partner",     "Partner"),
+    ("step6_email",       "Email"),
+    ("step7_rejected",    "Rejected"),
+]
+STEP_COLS = [col for col, _ in STEPS]
+DATE_COLS = [f"{col}_date" for col in STEP_COLS]
+EDIT_COLS = ["ord", "fund_name", "assigned_date"] + STEP_COLS
+
+# ---- DB helpers ----
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+PRAGMA mmap_size=134217728;
+"""
+
+# One connection per process; `with conn() as c:` only scopes a transaction on it
+@st.cache_resource
+def conn():
+    c = sqlite3.connect(DB, check_same_thread=False)
+    c.executescript(PRAGMAS)
+    return c
+
+# Sessions run on separate threads but share conn(), and sqlite3 has one transaction
+# per connection. Hold this around every use of it, with a write's bump_version().
+@st.cache_resource
+def db_lock():
+    return threading.Lock()
+
+def init_db():
+    with db_lock(), conn() as c:
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS funds (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ord INTEGER DEFAULT 1000,
+                fund_name TEXT NOT NULL,
+                assigned_date TEXT NOT NULL,
+                step2_inforequest INTEGER DEFAULT 0,
+                step3_analyst     INTEGER DEFAULT 0,
+                step4_myreview    INTEGER DEFAULT 0,
+                step5_partner     INTEGER DEFAULT 0,
+                step6_email       INTEGER DEFAULT 0,
+                step7_rejected    INTEGER DEFAULT 0,
+                step2_inforequest_date TEXT,
+                step3_analyst_date     TEXT,
+                step4_myreview_date    TEXT,
+                step5_partner_date     TEXT,
+                step6_email_date       TEXT,
+                step7_rejected_date    TEXT
+            )
+        """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_funds_ord_id ON funds(ord, id)")
+        c.commit()
+
+# Write counter shared by every session, like the connection and the load_df cache.
+# Seeded from the clock so that clearing the resource cache never hands out a
+# version a surviving session already holds.
+@st.cache_resource
+def funds_version():
+    return {"value": time.time_ns()}
+
+# Callers hold db_lock()
+def bump_version():
+    funds_version()["value"] += 1
+
+# `version` only keys the cache; mutations call bump_version(). Only the
+# current version is ever read, so older tables are evicted.
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_df(version):
+    with db_lock(), conn() as c:
+        return pd.read_sql_query("SELECT * FROM funds ORDER BY ord, id", c)
+
+# Session copy of the table; reloaded only when funds_version moves past it
+def get_df():
+    version = funds_version()["value"]
+    if st.session_state.get("funds_df_version") != version:
+        df = load_df(version)
+        # Stored as ISO YYYY-MM-DD by add_fund/save_rows; anything else becomes NaT
+        df["assigned_date"] = pd.to_datetime(df["assigned_date"], errors="coerce", format="%Y-%m-%d").dt.date
+        df[STEP_COLS] = df[STEP_COLS].astype(bool)
+        st.session_state["funds_df"] = df
+        st.session_state["funds_df_version"] = version
+    return st.session_state["funds_df"]
+
+# Version this session's copy was loaded or saved at
+def df_version():
+    return st.session_state.get("funds_df_version")
+
+# Adopts a frame saved on top of `version` as the session copy so get_df skips the
+# reload. Only safe if our copy was at `version` and our save was the sole write
+# since; otherwise it would miss another session's changes, so get_df reloads.
+def set_df(df, version):
+    if st.session_state.get("funds_df_version") == version and funds_version()["value"] == version + 1:
+        st.session_state["funds_df"] = df
+        st.session_state["funds_df_version"] = version + 1
+
+def add_fund(name, assigned):
+    with db_lock():
+        with conn() as c:
+            max_ord = c.execute("SELECT COALESCE(MAX(ord), 0) FROM funds").fetchone()[0] or 0
+            c.execute(
+                "INSERT INTO funds (ord, fund_name, assigned_date) VALUES (?,?,?)",
+                (max_ord + 10, name.strip(), assigned)
+            )
+            c.commit()
+        bump_version()
+
+# Each update is (row_id, changes, expected): new values for the cells that were
+# edited, and the values those cells held when the edit was made. A row is only
+# written while its cells still hold `expected`, and a step date is only filled in if
+# still empty, so concurrent edits to other cells or rows are kept. Column names come
+# from EDIT_COLS/DATE_COLS. Returns the ids left untouched because another session changed or
+# removed them (or un-rejected a row marked for deletion).
+def save_rows(updates, delete_ids):
+    conflicts = []
+    with db_lock():
+        with conn() as c:
+            for row_id, changes, expected in updates:
+                sets = ", ".join(f"{col}=COALESCE({col}, ?)" if col in DATE_COLS else f"{col}=?" for col in changes)
+                checks = "".join(f" AND {col} IS ?" for col in expected)
+                cur = c.execute(
+                    f"UPDATE funds SET {sets} WHERE id=?{checks}",
+                    (*changes.values(), row_id, *expected.values()),
+                )
+                if cur.rowcount == 0:
+                    conflicts.append(row_id)
+            for row_id in delete_ids:
+                if c.execute("DELETE FROM funds WHERE id=? AND step7_rejected=1", (row_id,)).rowcount == 0:
+                    conflicts.append(row_id)
+            c.commit()
+        bump_version()
+    return conflicts
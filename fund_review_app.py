@@ -1,19 +1,14 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-from datetime import datetime
+import numpy as np
+from datetime import date
 
-DB = "fund_checklist_table.db"
-TODAY = lambda: datetime.today().strftime("%Y-%m-%d")
+from fund_db import (
+    STEPS, STEP_COLS, DATE_COLS, EDIT_COLS,
+    init_db, get_df, set_df, df_version, add_fund, save_rows,
+)
 
-STEPS = [
-    ("step2_inforequest", "Info Request"),
-    ("step3_analyst",     "Analyst"),
-    ("step4_myreview",    "My Review"),
-    ("step5_partner",     "Partner"),
-    ("step6_email",       "Email"),
-    ("step7_rejected",    "Rejected"),
-]
+TODAY = lambda: date.today().isoformat()
 
 st.set_page_config(page_title="Fund Checklist", layout="wide")
 
@@ -28,122 +23,121 @@ h2, h3 {margin: .25rem 0;}
 </style>
 """, unsafe_allow_html=True)
 
-# ---- DB helpers ----
-def conn():
-    return sqlite3.connect(DB, check_same_thread=False)
-
-def init_db():
-    with conn() as c:
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS funds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ord INTEGER DEFAULT 1000,
-                fund_name TEXT NOT NULL,
-                assigned_date TEXT NOT NULL,
-                step2_inforequest INTEGER DEFAULT 0,
-                step3_analyst     INTEGER DEFAULT 0,
-                step4_myreview    INTEGER DEFAULT 0,
-                step5_partner     INTEGER DEFAULT 0,
-                step6_email       INTEGER DEFAULT 0,
-                step7_rejected    INTEGER DEFAULT 0,
-                step2_inforequest_date TEXT,
-                step3_analyst_date     TEXT,
-                step4_myreview_date    TEXT,
-                step5_partner_date     TEXT,
-                step6_email_date       TEXT,
-                step7_rejected_date    TEXT
-            )
-        """)
-        c.commit()
-
-def load_df():
-    with conn() as c:
-        return pd.read_sql_query("SELECT * FROM funds ORDER BY ord, id", c)
-
-def add_fund(name, assigned):
-    with conn() as c:
-        max_ord = c.execute("SELECT COALESCE(MAX(ord), 0) FROM funds").fetchone()[0] or 0
-        c.execute(
-            "INSERT INTO funds (ord, fund_name, assigned_date) VALUES (?,?,?)",
-            (max_ord + 10, name.strip(), assigned)
-        )
-        c.commit()
-
-def update_field(row_id, field, value):
-    with conn() as c:
-        c.execute(f"UPDATE funds SET {field}=? WHERE id=?", (value, row_id))
-        c.commit()
-
-def delete_row(row_id):
-    with conn() as c:
-        c.execute("DELETE FROM funds WHERE id=?", (row_id,))
-        c.commit()
-
-def stamp_if_new(old_val, new_val, old_date):
-    if (not old_val) and bool(new_val) and (not old_date):
-        return TODAY()
-    return old_date
+# ---- Callbacks ----
+# Bumped to drop the editor's pending edits once they are saved or discarded
+def editor_key():
+    return f"funds_editor_{st.session_state.get('editor_gen', 0)}"
+
+def reset_editor():
+    st.session_state["editor_gen"] = st.session_state.get("editor_gen", 0) + 1
+
+def on_add():
+    name = st.session_state["new_fund_name"]
+    if not name.strip():
+        return
+    # A new row resets the table editor, which would silently drop unsaved edits
+    if st.session_state.get(editor_key(), {}).get("edited_rows"):
+        st.toast("Save or discard your table edits before adding a fund.")
+        return
+    add_fund(name, st.session_state["new_fund_assigned"].isoformat())
+    st.session_state["new_fund_name"] = ""
+    st.toast("Added fund.")
+
+# Converts a cell to what SQLite stores for that column
+def db_value(col, value):
+    if pd.isna(value):
+        return None
+    if col == "assigned_date":
+        return value.isoformat()
+    if col == "fund_name":
+        return value
+    return int(value)
+
+def save_edits(df, edited):
+    # Only rejected rows may be deleted
+    to_delete = edited["delete"] & edited["step7_rejected"]
+    if (edited["delete"] & ~edited["step7_rejected"]).any():
+        st.toast("Only rejected funds can be deleted — tick Rejected first.")
+
+    # Stamp steps ticked for the first time; later untick/retick keeps the original date
+    today = TODAY()
+    for col in STEP_COLS:
+        newly_done = edited[col] & ~df[col] & df[col + "_date"].isna()
+        edited[col + "_date"] = np.where(newly_done, today, df[col + "_date"])
+
+    # The editor requires every editable column, so a missing value is never an
+    # edit (e.g. an unparseable stored assigned_date shown as NaT)
+    diff = edited[EDIT_COLS].ne(df[EDIT_COLS]) & edited[EDIT_COLS].notna()
+    changed = diff.any(axis=1) & ~to_delete
+    if not (changed.any() or to_delete.any()):
+        return
+    updates = []
+    for idx in diff.index[changed]:
+        cols = diff.columns[diff.loc[idx]]
+        changes = {col: db_value(col, edited.at[idx, col]) for col in cols}
+        changes.update({
+            col: today for col in DATE_COLS
+            if pd.isna(df.at[idx, col]) and pd.notna(edited.at[idx, col])
+        })
+        expected = {col: db_value(col, df.at[idx, col]) for col in cols if pd.notna(df.at[idx, col])}
+        updates.append((int(df.at[idx, "id"]), changes, expected))
+
+    version = df_version()
+    conflicts = save_rows(updates, edited.loc[to_delete, "id"].tolist())
+    if conflicts:
+        st.toast(f"{len(conflicts)} fund(s) were changed in another session and were not saved — reloaded.")
+    set_df(edited.loc[~to_delete, df.columns].sort_values(["ord", "id"], ignore_index=True), version)
+
+# Rebuilds the edited frame from the data_editor's cell deltas
+def on_save(df):
+    edited = df.assign(delete=False)
+    for pos, changes in st.session_state[editor_key()]["edited_rows"].items():
+        for col, value in changes.items():
+            if col == "assigned_date":
+                value = pd.Timestamp(value).date()
+            edited.iat[int(pos), edited.columns.get_loc(col)] = value
+    save_edits(df, edited)
+    reset_editor()
 
 # ---- App ----
 init_db()
 
 st.markdown("## ✅ Fund Review Checklist")
-st.markdown("<div class='small'>Add a fund (name + date). Tick steps as you complete them — dates are stored and shown on hover. 'Rejected' rows can be deleted instantly.</div>", unsafe_allow_html=True)
+st.markdown("<div class='small'>Add a fund (name + date). Tick steps as you complete them — dates are stamped when a step is first ticked. Tick 🗑️ on a 'Rejected' row to delete it. Press Save to apply edits.</div>", unsafe_allow_html=True)
 
 # Add fund form
-with st.form("add_fund", clear_on_submit=True):
+with st.form("add_fund"):
     c1, c2, c3 = st.columns([3,2,1])
-    fund_name = c1.text_input("Fund Name")
-    assigned = c2.date_input("Assigned Date", value=pd.to_datetime("today")).strftime("%Y-%m-%d")
-    submitted = c3.form_submit_button("Add")
-    if submitted and fund_name.strip():
-        add_fund(fund_name, assigned)
-        st.success("Added fund.")
-        st.rerun()
-
-df = load_df()
+    c1.text_input("Fund Name", key="new_fund_name")
+    c2.date_input("Assigned Date", value=date.today(), key="new_fund_assigned")
+    c3.form_submit_button("Add", on_click=on_add)
+
+df = get_df()
 if df.empty:
     st.info("No funds yet. Add your first fund above.")
     st.stop()
 
-# Ensure correct types
-df["assigned_date"] = pd.to_datetime(df["assigned_date"], errors="coerce").dt.date
-for col, _ in STEPS:
-    df[col] = df[col].astype(bool)
-
 # Table rendering
-for idx, row in df.iterrows():
-    cols = st.columns([0.6, 3, 1] + [1]*len(STEPS) + [0.7])
-    # Order
-    new_ord = cols[0].number_input("", value=int(row["ord"]), step=1, label_visibility="collapsed", key=f"ord_{row['id']}")
-    if new_ord != row["ord"]:
-        update_field(row["id"], "ord", new_ord)
-        st.rerun()
-
-    # Fund name
-    new_name = cols[1].text_input("", value=row["fund_name"], label_visibility="collapsed", key=f"name_{row['id']}")
-    if new_name != row["fund_name"]:
-        update_field(row["id"], "fund_name", new_name)
-        st.rerun()
-
-    # Assigned date
-    new_assigned = cols[2].date_input("", value=row["assigned_date"], label_visibility="collapsed", key=f"assigned_{row['id']}")
-    if new_assigned != row["assigned_date"]:
-        update_field(row["id"], "assigned_date", str(new_assigned))
-        st.rerun()
-
-    # Steps
-    for step_idx, (colname, label) in enumerate(STEPS):
-        tooltip = f"Completed: {row[colname + '_date']}" if row[colname + '_date'] else "Not completed yet"
-        checked = cols[3+step_idx].checkbox(label, value=row[colname], help=tooltip, key=f"{colname}_{row['id']}")
-        if checked != row[colname]:
-            date_stamp = stamp_if_new(row[colname], checked, row[colname + "_date"])
-            update_field(row["id"], colname, int(checked))
-            update_field(row["id"], colname + "_date", date_stamp)
-            st.rerun()
-
-    # Delete button for rejected
-    if row["step7_rejected"]:
-        if cols[-1].button("🗑️", key=f"del_{row['id']}", help="Delete this rejected fund"):
-            delete_row(row["id"])
-            st.rerun()
+column_config = {
+    "ord": st.column_config.NumberColumn("Order", step=1, format="%d", required=True),
+    "fund_name": st.column_config.TextColumn("Fund Name", required=True),
+    "assigned_date": st.column_config.DateColumn("Assigned Date", format="YYYY-MM-DD", required=True),
+    **{col: st.column_config.CheckboxColumn(label) for col, label in STEPS},
+    **{f"{col}_date": st.column_config.TextColumn(f"{label} date") for col, label in STEPS},
+    "delete": st.column_config.CheckboxColumn("🗑️", help="Delete this rejected fund"),
+}
+# Outside a form so pending edits reach session state, where on_add can see them.
+# Indexed by id so a reorder from another session resets the edits rather than
+# leaving them on whichever fund now sits at the same position.
+st.data_editor(
+    df.set_index("id").assign(delete=False),
+    key=editor_key(),
+    column_config=column_config,
+    column_order=["ord", "fund_name", "assigned_date"] + STEP_COLS + DATE_COLS + ["delete"],
+    disabled=DATE_COLS,
+    hide_index=True,
+    width="stretch",
+)
+c1, c2, _ = st.columns([1, 1, 8])
+c1.button("Save", on_click=on_save, args=(df,))
+c2.button("Discard", on_click=reset_editor)